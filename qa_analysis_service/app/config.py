@@ -20,6 +20,19 @@ class Settings(BaseSettings):
     rag_service_timeout: int = int(os.getenv("RAG_SERVICE_TIMEOUT", "60"))
     rag_service_token: str = os.getenv("RAG_SERVICE_TOKEN", "cc9dfc7473d3486dac06e1634d4ce38e")
     rag_service_site_id: str = os.getenv("RAG_SERVICE_SITE_ID", "10001")
+    rag_backend: str = os.getenv("RAG_BACKEND", "top_segments")
+    rag_pool_connections: int = int(os.getenv("RAG_POOL_CONNECTIONS", "20"))
+    rag_pool_maxsize: int = int(os.getenv("RAG_POOL_MAXSIZE", "50"))
+    rag_max_retries: int = int(os.getenv("RAG_MAX_RETRIES", "3"))
+    rag_health_check_ttl: float = float(os.getenv("RAG_HEALTH_CHECK_TTL", "10"))
+    rag_batch_questions: bool = os.getenv("RAG_BATCH_QUESTIONS", "true").lower() == "true"
+    rag_max_concurrency: int = int(os.getenv("RAG_MAX_CONCURRENCY", "16"))
+    rag_cache_backend: str = os.getenv("RAG_CACHE_BACKEND", "memory")
+    redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    rag_cache_maxsize: int = int(os.getenv("RAG_CACHE_MAXSIZE", "1024"))
+    rag_cache_ttl: int = int(os.getenv("RAG_CACHE_TTL", "600"))
+    rag_semantic_cache: bool = os.getenv("RAG_SEMANTIC_CACHE", "false").lower() == "true"
+    rag_semantic_cache_threshold: float = float(os.getenv("RAG_SEMANTIC_CACHE_THRESHOLD", "0.95"))
     
     # Chat data service configuration
     chat_data_service_url: str = os.getenv("CHAT_DATA_SERVICE_URL", "http://localhost:8001")
@@ -32,6 +45,7 @@ class Settings(BaseSettings):
     
     # Analysis configuration
     top_k_kb_chunks: int = int(os.getenv("TOP_K_KB_CHUNKS", "6"))
+    analysis_max_concurrency: int = int(os.getenv("ANALYSIS_MAX_CONCURRENCY", "8"))
     
     # Retry configuration
     max_retries: int = int(os.getenv("MAX_RETRIES", "10"))
@@ -1,4 +1,5 @@
 """Main FastAPI application for QA Analysis Service."""
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from typing import Optional
@@ -10,7 +11,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.config import settings
 from app.models.analysis import AnalysisRequest, AnalysisResponse
 from app.services.analysis_service import AnalysisService
-from app.services.rag_client import RAGClient, RAGClientError
+from app.services.rag_client import RAGClient, RAGClientError, get_rag_client
 from app.services.llm_client import LLMClient, LLMClientError
 
 
@@ -22,10 +23,15 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Debug mode enables the detailed request/response logging this service emits at DEBUG level
+if settings.debug:
+    logging.getLogger("app").setLevel(logging.DEBUG)
+    logger.setLevel(logging.DEBUG)
 
-# Global instances
+
+# Global instances; the RAG client is shared process-wide and created at import
+rag_client: RAGClient = get_rag_client()
 analysis_service: Optional[AnalysisService] = None
-rag_client: Optional[RAGClient] = None
 llm_client: Optional[LLMClient] = None
 
 
@@ -57,15 +63,12 @@ async def verify_token(request: Request, credentials: HTTPAuthorizationCredentia
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle."""
-    global analysis_service, rag_client, llm_client
+    global analysis_service, llm_client
     
     # Startup
     logger.info("Starting QA Analysis Service...")
     
     try:
-        # Initialize services
-        rag_client = RAGClient()
-        
         # Initialize LLM client with config settings
         llm_client = LLMClient(
             api_key=settings.openai_api_key,
@@ -75,8 +78,8 @@ async def lifespan(app: FastAPI):
         
         analysis_service = AnalysisService(rag_client=rag_client, llm_client=llm_client)
         
-        # Check RAG service health
-        if rag_client.health_check():
+        # Check RAG service health (also warms the pooled connection)
+        if await asyncio.to_thread(rag_client.health_check):
             logger.info("RAG service is healthy")
         else:
             logger.warning("RAG service is not available - service will use fallback mode")
@@ -84,13 +87,14 @@ async def lifespan(app: FastAPI):
         logger.info("QA Analysis Service started successfully")
         
     except Exception as e:
-        logger.error(f"Failed to initialize services: {e}")
+        logger.error("Failed to initialize services: %s", e)
         raise
     
     yield
     
     # Shutdown
     logger.info("Shutting down QA Analysis Service...")
+    rag_client.close()
 
 
 # Create FastAPI app
@@ -128,7 +132,7 @@ async def health_check(authenticated: bool = Depends(verify_token)):
         raise HTTPException(status_code=503, detail="Service not initialized")
     
     # Check RAG service
-    rag_healthy = rag_client.health_check() if rag_client else False
+    rag_healthy = await asyncio.to_thread(rag_client.health_check)
     
     return {
         "status": "healthy",
@@ -165,69 +169,72 @@ async def analyze_conversation(
     
     try:
         # Basic logging always
-        logger.info(f"Starting analysis for conversation {request.conversation.id}")
+        logger.info("Starting analysis for conversation %s", request.conversation.id)
         
         # Detailed logging only in debug mode
-        if settings.debug:
-            logger.info("=" * 80)
-            logger.info("📥 INCOMING API REQUEST (DEBUG MODE)")
-            logger.info("=" * 80)
-            logger.info(f"Conversation ID: {request.conversation.id}")
-            logger.info(f"Conversation Type: {request.conversation.type}")
-            logger.info(f"Number of Messages: {len(request.conversation.messages)}")
-            logger.info(f"Integrated KB ID: {request.integratedKbId}")
+        if settings.debug and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=" * 80)
+            logger.debug("📥 INCOMING API REQUEST (DEBUG MODE)")
+            logger.debug("=" * 80)
+            logger.debug("Conversation ID: %s", request.conversation.id)
+            logger.debug("Conversation Type: %s", request.conversation.type)
+            logger.debug("Number of Messages: %d", len(request.conversation.messages))
+            logger.debug("Integrated KB ID: %s", request.integratedKbId)
             
             for i, msg in enumerate(request.conversation.messages):
-                logger.info(f"  Message {i+1} ({msg.role}): {msg.content[:100]}..." if len(msg.content) > 100 else f"  Message {i+1} ({msg.role}): {msg.content}")
+                logger.debug("  Message %d (%s): %.100s", i + 1, msg.role, msg.content)
         
-        # Perform analysis
-        response = analysis_service.analyze_conversation(request)
+        # Perform analysis in a worker thread so blocking LLM/RAG calls don't stall the event loop
+        response = await asyncio.to_thread(analysis_service.analyze_conversation, request)
         
         # Basic logging always
-        logger.info(f"Analysis completed for conversation {response.conversationId} - {len(response.questionRatings)} Q&A pairs analyzed")
+        logger.info(
+            "Analysis completed for conversation %s - %d Q&A pairs analyzed",
+            response.conversationId, len(response.questionRatings)
+        )
         
         # Detailed logging only in debug mode
-        if settings.debug:
-            logger.info("=" * 80)
-            logger.info("📤 OUTGOING API RESPONSE (DEBUG MODE)")
-            logger.info("=" * 80)
-            logger.info(f"Conversation ID: {response.conversationId}")
-            logger.info(f"Conversation Type: {response.conversationType}")
-            logger.info(f"Analysis Time: {response.analysisTime}")
-            logger.info(f"Number of Question Ratings: {len(response.questionRatings)}")
+        if settings.debug and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=" * 80)
+            logger.debug("📤 OUTGOING API RESPONSE (DEBUG MODE)")
+            logger.debug("=" * 80)
+            logger.debug("Conversation ID: %s", response.conversationId)
+            logger.debug("Conversation Type: %s", response.conversationType)
+            logger.debug("Analysis Time: %s", response.analysisTime)
+            logger.debug("Number of Question Ratings: %d", len(response.questionRatings))
             
             for i, rating in enumerate(response.questionRatings):
-                logger.info(f"\n  Rating {i+1}:")
-                logger.info(f"    Rewritten Question: {rating.aiRewrittenQuestion}")
-                logger.info(f"    Agent Answer: {rating.agentAnswer}")
-                logger.info(f"    AI Suggested Answer: {rating.aiSuggestedAnswer}")
-                logger.info(f"    AI Score: {rating.aiScore}")
-                logger.info(f"    AI Rationale: {rating.aiRationale}")
+                logger.debug("\n  Rating %d:", i + 1)
+                logger.debug("    Rewritten Question: %s", rating.aiRewrittenQuestion)
+                logger.debug("    Agent Answer: %s", rating.agentAnswer)
+                logger.debug("    AI Suggested Answer: %s", rating.aiSuggestedAnswer)
+                logger.debug("    AI Score: %s", rating.aiScore)
+                logger.debug("    AI Rationale: %s", rating.aiRationale)
             
-            logger.info("=" * 80)
+            logger.debug("=" * 80)
         
         return response
         
     except ValueError as e:
         # Handle validation errors
-        logger.warning(f"Validation error for conversation {request.conversation.id}: {e}")
+        logger.warning("Validation error for conversation %s: %s", request.conversation.id, e)
         raise HTTPException(status_code=400, detail="Invalid request parameters")
         
     except LLMClientError as e:
         # Handle LLM service errors
-        logger.error(f"LLM service error for conversation {request.conversation.id}: {e}")
+        logger.error("LLM service error for conversation %s: %s", request.conversation.id, e)
         raise HTTPException(status_code=503, detail="AI service temporarily unavailable")
         
     except RAGClientError as e:
         # Handle RAG service errors (non-critical, continue with fallback)
-        logger.warning(f"RAG service error for conversation {request.conversation.id}: {e}")
+        logger.warning("RAG service error for conversation %s: %s", request.conversation.id, e)
         # Analysis will continue with fallback mechanisms
-        response = analysis_service.analyze_conversation(request)
+        response = await asyncio.to_thread(analysis_service.analyze_conversation, request)
         return response
         
     except Exception as e:
         # Handle all other unexpected errors
-        logger.error(f"Unexpected error analyzing conversation {request.conversation.id}: {e}", exc_info=True)
+        logger.error("Unexpected error analyzing conversation %s: %s", request.conversation.id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Analysis failed due to internal error")
 
 
@@ -3,7 +3,7 @@ from typing import List, Optional, Literal
 from datetime import datetime
 from uuid import uuid4
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field
 
 
 class Message(BaseModel):
@@ -118,7 +118,9 @@ class RAGResponse(BaseModel):
     
     question: str = Field(..., description="The original question")
     chunks: List[KBChunk] = Field(..., description="Retrieved KB chunks")
-    formatted_chunks: List[str] = Field(
-        ..., 
-        description="Formatted chunks with source citations"
-    ) 
\ No newline at end of file
+    
+    @computed_field(description="Formatted chunks with source citations")
+    @property
+    def formatted_chunks(self) -> List[str]:
+        """Chunk contents with their source citation, derived from chunks."""
+        return [f"{chunk.content} (source: {chunk.source})" for chunk in self.chunks]
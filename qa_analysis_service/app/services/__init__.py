@@ -1,6 +1,6 @@
 """Services package for QA Analysis."""
 from .analysis_service import AnalysisService
-from .rag_client import RAGClient, RAGClientError
+from .rag_client import RAGClient, RAGClientError, get_rag_client
 from .llm_client import LLMClient, LLMClientError
 from .prompt_builder import PromptBuilder
 
@@ -8,6 +8,7 @@ __all__ = [
     "AnalysisService",
     "RAGClient",
     "RAGClientError", 
+    "get_rag_client",
     "LLMClient",
     "LLMClientError",
     "PromptBuilder"
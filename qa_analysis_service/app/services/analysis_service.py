@@ -1,5 +1,7 @@
 """Core QA analysis service implementing the 3-stage algorithm."""
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Optional
 from datetime import datetime
 
@@ -15,13 +17,19 @@ from ..models.analysis import (
     AIAnswers,
     AIAnswer
 )
-from .rag_client import RAGClient, RAGClientError
+from .rag_client import RAGClient, RAGClientError, get_rag_client
 from .llm_client import LLMClient, LLMClientError
 from .prompt_builder import PromptBuilder
 
 
 logger = logging.getLogger(__name__)
 
+# Transcript line prefixes for the roles included in Stage 1 segmentation
+_ROLE_PREFIXES = {"customer": "CUST", "agent": "AGT"}
+
+# Conversations with fewer threads run stages 2 and 3 inline; pool dispatch isn't worth it
+_PARALLEL_THREAD_MIN = 4
+
 
 class AnalysisService:
     """Service for performing comprehensive QA analysis using the 3-stage algorithm."""
@@ -30,17 +38,20 @@ class AnalysisService:
         """Initialize the analysis service.
         
         Args:
-            rag_client: RAG client for retrieving KB chunks. If None, creates default client.
+            rag_client: RAG client for retrieving KB chunks. If None, uses the shared client.
             llm_client: LLM client for OpenAI calls. If None, creates default client.
         """
         self.settings = settings
-        self.rag_client = rag_client or RAGClient()
+        self.rag_client = rag_client or get_rag_client()
         self.llm_client = llm_client or LLMClient(
             api_key=settings.openai_api_key,
             model=settings.openai_model,
             temperature=settings.openai_temperature
         )
         self.prompt_builder = PromptBuilder()
+        self.max_concurrency = getattr(settings, 'analysis_max_concurrency', 8)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
     
     def analyze_conversation(self, request: AnalysisRequest) -> AnalysisResponse:
         """Analyze a conversation using the 3-stage algorithm.
@@ -58,32 +69,22 @@ class AnalysisService:
             threads = self._stage1_segment_conversation(request.conversation)
             logger.info(f"Stage 1 complete: Extracted {len(threads)} Q&A threads")
             
-            # Process each thread through stages 2 and 3
-            question_ratings = []
-            scores = []
+            # Retrieve KB chunks for all questions in one RAG round trip
+            kb_chunks_per_thread = self._retrieve_kb_chunks_batch([thread.question for thread in threads])
             
-            for thread in threads:
-                # Stage 2: Retrieve KB chunks and generate AI answers
-                ai_answers = self._stage2_generate_ai_answers(
-                    thread.question, 
-                    request.integratedKbId
-                )
-                
-                # Extract verified KB chunks from AI answers context
-                verified_kb_chunks = self._extract_verified_kb_chunks(ai_answers)
-                
-                # Stage 3: Score the agent's answer using verified KB chunks
-                rating = self._stage3_score_agent_answer(
-                    thread.question,
-                    thread.answer,
-                    ai_answers,
-                    verified_kb_chunks
-                )
-                
-                question_ratings.append(rating)
-                # Only include scores >= 0 in average (exclude out-of-scope -1 scores)
-                if rating.aiScore >= 0:
-                    scores.append(rating.aiScore)
+            # Process each thread through stages 2 and 3; threads are independent,
+            # so longer conversations run their LLM calls concurrently
+            def rate(job: Tuple[ConversationThread, List[str]]) -> QuestionRating:
+                return self._rate_thread(job[0], request.integratedKbId, job[1])
+            
+            jobs = list(zip(threads, kb_chunks_per_thread))
+            if len(jobs) >= _PARALLEL_THREAD_MIN and self.max_concurrency > 1:
+                question_ratings = list(self._get_executor().map(rate, jobs))
+            else:
+                question_ratings = [rate(job) for job in jobs]
+            
+            # Only include scores >= 0 in average (exclude out-of-scope -1 scores)
+            scores = [rating.aiScore for rating in question_ratings if rating.aiScore >= 0]
             
             logger.info(f"Analysis completed for conversation {request.conversation.id}")
             logger.info(f"Processed {len(scores)} in-scope Q&A pairs with scores: {[round(s, 1) for s in scores]}")
@@ -99,6 +100,42 @@ class AnalysisService:
             logger.error(f"Analysis failed for conversation {request.conversation.id}: {e}")
             raise
     
+    def _rate_thread(self, thread: ConversationThread, kb_id: str, kb_chunks: List[str]) -> QuestionRating:
+        """Run stages 2 and 3 for one Q&A thread.
+        
+        Args:
+            thread: The Q&A thread to rate.
+            kb_id: The knowledge base ID.
+            kb_chunks: Formatted KB chunks retrieved for the thread's question.
+            
+        Returns:
+            QuestionRating: The rating for the agent's answer.
+        """
+        # Stage 2: Generate AI answers from the retrieved KB chunks
+        ai_answers = self._stage2_generate_ai_answers(thread.question, kb_id, kb_chunks)
+        
+        # Extract verified KB chunks from AI answers context
+        verified_kb_chunks = self._extract_verified_kb_chunks(ai_answers)
+        
+        # Stage 3: Score the agent's answer using verified KB chunks
+        return self._stage3_score_agent_answer(
+            thread.question,
+            thread.answer,
+            ai_answers,
+            verified_kb_chunks
+        )
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Return the thread pool for per-thread stages, creating it on first use."""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_concurrency,
+                        thread_name_prefix="analysis"
+                    )
+        return self._executor
+    
     def _stage1_segment_conversation(self, conversation: Conversation) -> List[ConversationThread]:
         """Stage 1: Segment conversation into Q&A threads using LLM.
         
@@ -110,21 +147,12 @@ class AnalysisService:
         """
         logger.info("Stage 1: Segmenting conversation into threads")
         
-        # Convert messages to transcript format
-        transcript_lines = []
-        for msg in conversation.messages:
-            if msg.role == "customer":
-                role_prefix = "CUST"
-            elif msg.role == "agent":
-                role_prefix = "AGT"
-            else:
-                continue  # Skip system messages
-            
-            # Extract time from timestamp (HH:MM format)
-            time_str = msg.timestamp.strftime("%H:%M")
-            transcript_lines.append(f"{role_prefix} {time_str} {msg.content}")
-        
-        transcript = "\n".join(transcript_lines)
+        # Convert messages to transcript format ("CUST 08:50 text"), skipping system messages
+        transcript = "\n".join(
+            f"{_ROLE_PREFIXES[msg.role]} {msg.timestamp:%H:%M} {msg.content}"
+            for msg in conversation.messages
+            if msg.role in _ROLE_PREFIXES
+        )
         
         # If no valid messages found, return empty list
         if not transcript.strip():
@@ -182,41 +210,92 @@ class AnalysisService:
         
         return threads
     
-    def _stage2_generate_ai_answers(self, question: str, kb_id: str) -> AIAnswers:
+    def _retrieve_kb_chunks_batch(self, questions: List[str]) -> List[List[str]]:
+        """Retrieve formatted KB chunks for several questions in one RAG call.
+        
+        Falls back to concurrent per-question requests when batching is disabled in
+        config or the batched call fails, so one bad question or a transient error
+        only costs that question its KB context.
+        
+        Args:
+            questions: The questions to retrieve KB chunks for.
+            
+        Returns:
+            Formatted KB chunks for each question, empty for questions whose RAG request failed.
+        """
+        if not questions:
+            return []
+        
+        rag_responses = None
+        if self.settings.rag_batch_questions:
+            try:
+                rag_responses = self.rag_client.retrieve_chunks_batch(questions, k=6)
+            except RAGClientError as e:
+                logger.warning(f"Batched RAG request failed, retrying per question: {e}")
+        if rag_responses is None:
+            rag_responses = self.rag_client.retrieve_chunks_many(questions, k=6, return_exceptions=True)
+        
+        kb_chunks_per_question = []
+        for question, rag_response in zip(questions, rag_responses):
+            if isinstance(rag_response, RAGClientError):
+                logger.warning(f"RAG service error: {rag_response}")
+                if self.settings.debug:
+                    logger.info("📚 KB CHUNKS: None (using empty fallback due to RAG error)")
+                else:
+                    logger.info("Using empty KB chunks fallback due to RAG error")
+                kb_chunks_per_question.append([])
+                continue
+            kb_chunks = rag_response.formatted_chunks
+            self._log_kb_chunks(question, kb_chunks)
+            kb_chunks_per_question.append(kb_chunks)
+        
+        return kb_chunks_per_question
+    
+    def _log_kb_chunks(self, question: str, kb_chunks: List[str]) -> None:
+        """Log the KB chunks retrieved for a question.
+        
+        Args:
+            question: The question the chunks were retrieved for.
+            kb_chunks: The formatted KB chunks.
+        """
+        if self.settings.debug:
+            logger.info("📚 KB CHUNKS RETRIEVED (DEBUG MODE):")
+            logger.info(f"  Question: {question}")
+            logger.info(f"  Number of chunks: {len(kb_chunks)}")
+            for i, chunk in enumerate(kb_chunks):
+                logger.info(f"    Chunk {i+1}: {chunk[:100]}..." if len(chunk) > 100 else f"    Chunk {i+1}: {chunk}")
+        else:
+            logger.info(f"Retrieved {len(kb_chunks)} KB chunks for question")
+    
+    def _stage2_generate_ai_answers(self, question: str, kb_id: str,
+                                    kb_chunks: Optional[List[str]] = None) -> AIAnswers:
         """Stage 2: Retrieve KB chunks and generate AI answers.
         
         Args:
             question: The question to answer.
             kb_id: The knowledge base ID.
+            kb_chunks: Pre-fetched formatted KB chunks. If None, retrieves them from the RAG service.
             
         Returns:
             AIAnswers: The AI-generated answers with context.
         """
         logger.info(f"Stage 2: Generating AI answers for question: {question[:50]}...")
         
-        # Retrieve KB chunks from RAG service
-        try:
-            rag_response = self.rag_client.retrieve_chunks(question, k=6)
-            kb_chunks = rag_response.formatted_chunks
-            
-            # Log KB chunks for this question (debug mode only)
-            if self.settings.debug:
-                logger.info("📚 KB CHUNKS RETRIEVED (DEBUG MODE):")
-                logger.info(f"  Question: {question}")
-                logger.info(f"  Number of chunks: {len(kb_chunks)}")
-                for i, chunk in enumerate(kb_chunks):
-                    logger.info(f"    Chunk {i+1}: {chunk[:100]}..." if len(chunk) > 100 else f"    Chunk {i+1}: {chunk}")
-            else:
-                logger.info(f"Retrieved {len(kb_chunks)} KB chunks for question")
-                
-        except RAGClientError as e:
-            logger.warning(f"RAG service error: {e}")
-            # Use empty chunks as fallback
-            kb_chunks = []
-            if self.settings.debug:
-                logger.info("📚 KB CHUNKS: None (using empty fallback due to RAG error)")
-            else:
-                logger.info("Using empty KB chunks fallback due to RAG error")
+        if kb_chunks is None:
+            # Retrieve KB chunks from RAG service
+            try:
+                rag_response = self.rag_client.retrieve_chunks(question, k=6)
+                kb_chunks = rag_response.formatted_chunks
+                self._log_kb_chunks(question, kb_chunks)
+                    
+            except RAGClientError as e:
+                logger.warning(f"RAG service error: {e}")
+                # Use empty chunks as fallback
+                kb_chunks = []
+                if self.settings.debug:
+                    logger.info("📚 KB CHUNKS: None (using empty fallback due to RAG error)")
+                else:
+                    logger.info("Using empty KB chunks fallback due to RAG error")
         
         # Generate AI answers using LLM
         messages = self.prompt_builder.draft_prompt(question, kb_chunks)
@@ -0,0 +1,135 @@
+"""Wire-format strategies for the RAG services the client can talk to."""
+from typing import Any, List, Protocol, Tuple
+
+import requests
+
+from ..models.analysis import KBChunk, RAGResponse
+
+
+class RAGBackend(Protocol):
+    """Request/response shape of one RAG service API.
+
+    RAGClient owns the session, caching and error handling; a backend only
+    knows how to build the request, parse the reply and probe health.
+    """
+
+    supports_batch: bool
+
+    def build_request(self, base_url: str, site_id: str, questions: List[str], k: int) -> Tuple[str, dict]:
+        """Return the URL and JSON payload for retrieving chunks for questions."""
+        ...
+
+    def parse(self, questions: List[str], response_json: Any) -> List[RAGResponse]:
+        """Transform a response into RAGResponse objects aligned with questions.
+
+        Raises:
+            ValueError: If the response does not match the questions sent.
+        """
+        ...
+
+    def health_check(self, session: requests.Session, base_url: str, site_id: str) -> bool:
+        """Return True if the service answers its health probe."""
+        ...
+
+
+class TopSegmentsBackend:
+    """Backend for the production topSegments API, which accepts batched questions."""
+
+    supports_batch = True
+
+    def build_request(self, base_url: str, site_id: str, questions: List[str], k: int) -> Tuple[str, dict]:
+        # The topSegments API decides how many segments to return; k is not sent
+        return f"{base_url}/topSegments?siteId={site_id}", {"questions": questions}
+
+    def parse(self, questions: List[str], response_json: Any) -> List[RAGResponse]:
+        if len(questions) == 1:
+            return [self._transform_response(questions[0], response_json)]
+        if len(response_json) != len(questions):
+            raise ValueError(
+                f"RAG service returned {len(response_json)} results for {len(questions)} questions"
+            )
+        # Batched results come back in question order, one item per question
+        return [
+            self._transform_response(question, [item])
+            for question, item in zip(questions, response_json)
+        ]
+
+    def health_check(self, session: requests.Session, base_url: str, site_id: str) -> bool:
+        # Probe reachability with OPTIONS instead of running a real retrieval; a 2xx answer,
+        # or 405 when OPTIONS isn't allowed, means the endpoint exists and accepted our token
+        response = session.options(f"{base_url}/topSegments?siteId={site_id}", timeout=5)
+        return 200 <= response.status_code < 300 or response.status_code == 405
+
+    @staticmethod
+    def _transform_response(question: str, api_response: List[dict]) -> RAGResponse:
+        """Transform the real API response to our internal format.
+
+        Args:
+            question: The original question.
+            api_response: The response from the real API.
+
+        Returns:
+            RAGResponse: Transformed response in our internal format.
+        """
+        # Flatten topSegments across all response items and build chunks in one pass.
+        # model_construct skips per-field validation: these values come from the RAG service's
+        # fixed response schema, not from user input.
+        segments = [segment for item in api_response for segment in item.get("topSegments", ())]
+        chunks = [
+            KBChunk.model_construct(
+                content=segment.get("segment", ""),
+                source=segment.get("file", "Unknown"),
+                confidence=segment.get("score", 0.0)
+            )
+            for segment in segments
+        ]
+
+        return RAGResponse.model_construct(
+            question=question,
+            chunks=chunks
+        )
+
+
+class RetrieveChunksBackend:
+    """Backend for the dummy RAG service's /retrieve-chunks API, one question per request."""
+
+    supports_batch = False
+
+    def build_request(self, base_url: str, site_id: str, questions: List[str], k: int) -> Tuple[str, dict]:
+        if len(questions) != 1:
+            raise ValueError("The retrieve-chunks API accepts one question per request")
+        return f"{base_url}/retrieve-chunks", {"question": questions[0], "k": k}
+
+    def parse(self, questions: List[str], response_json: Any) -> List[RAGResponse]:
+        # The response already uses our chunk schema; formatted_chunks is derived locally
+        chunks = [KBChunk.model_construct(**chunk) for chunk in response_json.get("chunks", ())]
+        return [RAGResponse.model_construct(question=questions[0], chunks=chunks)]
+
+    def health_check(self, session: requests.Session, base_url: str, site_id: str) -> bool:
+        response = session.get(f"{base_url}/health", timeout=5)
+        return response.status_code == 200
+
+
+_BACKENDS = {
+    "top_segments": TopSegmentsBackend,
+    "retrieve_chunks": RetrieveChunksBackend,
+}
+
+
+def create_rag_backend(settings) -> RAGBackend:
+    """Create the RAG backend selected in config.
+
+    Args:
+        settings: Application settings.
+
+    Returns:
+        The configured backend.
+
+    Raises:
+        ValueError: If the configured backend is unknown.
+    """
+    name = getattr(settings, 'rag_backend', 'top_segments')
+    backend_cls = _BACKENDS.get(name)
+    if backend_cls is None:
+        raise ValueError(f"Unknown RAG backend: {name}")
+    return backend_cls()
@@ -0,0 +1,147 @@
+"""Cache backends for RAG responses."""
+import logging
+import threading
+from typing import Dict, Optional, Protocol
+
+import orjson
+
+from ..models.analysis import KBChunk, RAGResponse
+from ..utils.cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+
+class RAGCacheBackend(Protocol):
+    """Storage for RAG responses keyed by a string cache key."""
+
+    def get(self, key: str) -> Optional[RAGResponse]:
+        """Return the cached response for key, or None on a miss."""
+        ...
+
+    def set(self, key: str, value: RAGResponse) -> None:
+        """Store a response under key."""
+        ...
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        ...
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache statistics."""
+        ...
+
+
+class InMemoryRAGCache:
+    """Per-process LRU+TTL cache of RAG responses."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 600.0):
+        """Initialize the in-memory cache.
+
+        Args:
+            maxsize: Maximum number of cached responses.
+            ttl: Seconds a response stays cached.
+        """
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: str) -> Optional[RAGResponse]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: RAGResponse) -> None:
+        self._cache.set(key, value)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self._cache.stats()
+
+
+class RedisRAGCache:
+    """RAG response cache shared across workers and pods through Redis.
+
+    Redis errors are logged and treated as cache misses so an unavailable
+    cache never fails a retrieval.
+    """
+
+    def __init__(self, url: str, ttl: int = 600, prefix: str = "rag:"):
+        """Initialize the Redis cache.
+
+        Args:
+            url: Redis connection URL.
+            ttl: Seconds a response stays cached.
+            prefix: Key prefix for cached responses.
+        """
+        # Imported lazily: redis is an optional dependency (requirements-redis.txt),
+        # only needed when this backend is configured
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        # Guards the hit/miss counters, which concurrent retrievals update from many threads
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[RAGResponse]:
+        try:
+            raw = self._redis.get(self.prefix + key)
+        except Exception as e:
+            logger.warning("Redis RAG cache get failed: %s", e)
+            raw = None
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if raw is None:
+            return None
+        data = orjson.loads(raw)
+        # Entries were written from already-transformed RAG service responses
+        return RAGResponse.model_construct(
+            question=data["question"],
+            chunks=[KBChunk.model_construct(**chunk) for chunk in data["chunks"]]
+        )
+
+    def set(self, key: str, value: RAGResponse) -> None:
+        try:
+            self._redis.set(self.prefix + key, orjson.dumps(value.model_dump()), ex=self.ttl)
+        except Exception as e:
+            logger.warning("Redis RAG cache set failed: %s", e)
+
+    def clear(self) -> None:
+        try:
+            keys = list(self._redis.scan_iter(match=self.prefix + "*"))
+            if keys:
+                self._redis.delete(*keys)
+        except Exception as e:
+            logger.warning("Redis RAG cache clear failed: %s", e)
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+def create_rag_cache(settings) -> RAGCacheBackend:
+    """Create the RAG cache backend selected in config.
+
+    Args:
+        settings: Application settings.
+
+    Returns:
+        The configured cache backend.
+
+    Raises:
+        ValueError: If the configured backend is unknown.
+    """
+    backend = getattr(settings, 'rag_cache_backend', 'memory')
+    ttl = getattr(settings, 'rag_cache_ttl', 600)
+    if backend == "memory":
+        return InMemoryRAGCache(maxsize=getattr(settings, 'rag_cache_maxsize', 1024), ttl=ttl)
+    if backend == "redis":
+        return RedisRAGCache(getattr(settings, 'redis_url', 'redis://localhost:6379/0'), ttl=ttl)
+    raise ValueError(f"Unknown RAG cache backend: {backend}")
@@ -1,16 +1,29 @@
-"""Client for communicating with the real RAG service."""
+"""Client for communicating with the RAG service."""
+import hashlib
 import logging
-from typing import Optional, List
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, List, Tuple, Union
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException, Timeout, ConnectionError
+from urllib3.util.retry import Retry
 
 from ..config import settings
-from ..models.analysis import RAGRequest, RAGResponse, KBChunk
+from ..models.analysis import RAGResponse
+from .rag_backends import RAGBackend, create_rag_backend
+from .rag_cache import RAGCacheBackend, create_rag_cache
+from ..utils.semantic_cache import SemanticCache, sentence_transformer_embedder
 
 
 logger = logging.getLogger(__name__)
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
 
 class RAGClientError(Exception):
     """Exception raised when RAG service communication fails."""
@@ -18,10 +31,17 @@ class RAGClientError(Exception):
 
 
 class RAGClient:
-    """Client for interacting with the real RAG service."""
+    """Client for interacting with the RAG service.
+    
+    The wire format is delegated to a RAGBackend, so session pooling, caching
+    and error handling are shared by every RAG API the service can target.
+    """
     
     def __init__(self, base_url: Optional[str] = None, timeout: Optional[int] = None, 
-                 token: Optional[str] = None, site_id: Optional[str] = None):
+                 token: Optional[str] = None, site_id: Optional[str] = None,
+                 semantic_cache: Optional[SemanticCache] = None,
+                 cache: Optional[RAGCacheBackend] = None,
+                 backend: Optional[RAGBackend] = None):
         """Initialize the RAG client.
         
         Args:
@@ -29,14 +49,56 @@ class RAGClient:
             timeout: Request timeout in seconds. Defaults to config setting.
             token: Authentication token. Defaults to config setting.
             site_id: Site ID for the API. Defaults to config setting.
+            semantic_cache: Cache for paraphrased questions. Defaults to a sentence-transformers
+                backed cache when enabled in config, otherwise disabled.
+            cache: Exact-match response cache. Defaults to the backend selected in config.
+            backend: RAG API request/response strategy. Defaults to the backend selected in config.
         """
         self.settings = settings
+        # Read once; debug mode is fixed for the lifetime of the client
+        self._debug = bool(settings.debug)
         self.base_url = base_url or settings.rag_service_url
         self.timeout = timeout or getattr(settings, 'rag_service_timeout', 60)
         self.token = token or getattr(settings, 'rag_service_token', 'cc9dfc7473d3486dac06e1634d4ce38e')
         self.site_id = site_id or getattr(settings, 'rag_service_site_id', '10001')
+        self.backend = backend if backend is not None else create_rag_backend(settings)
         self.session = requests.Session()
         
+        # Size the connection pool for concurrent workers and retry transient gateway errors.
+        # Only failures that come back fast are retried: connection errors and 502/503. Read
+        # timeouts and 504s already used up a full timeout, so read=0 and no 504 retry keep one
+        # call close to the configured timeout instead of a multiple of it. Retrying POST assumes the
+        # retrieval endpoint is idempotent, which holds for these read-only lookups.
+        adapter = HTTPAdapter(
+            pool_connections=getattr(settings, 'rag_pool_connections', 20),
+            pool_maxsize=getattr(settings, 'rag_pool_maxsize', 50),
+            max_retries=Retry(
+                total=getattr(settings, 'rag_max_retries', 3),
+                read=0,
+                backoff_factor=0.2,
+                status_forcelist=[502, 503],
+                allowed_methods=["POST", "GET"]
+            )
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.max_concurrency = getattr(settings, 'rag_max_concurrency', 16)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.health_check_ttl = getattr(settings, 'rag_health_check_ttl', 10.0)
+        self._last_health_ts = 0.0
+        self._last_health_ok = False
+        
+        self._cache = cache if cache is not None else create_rag_cache(settings)
+        if semantic_cache is None and getattr(settings, 'rag_semantic_cache', False):
+            semantic_cache = SemanticCache(
+                sentence_transformer_embedder(),
+                threshold=getattr(settings, 'rag_semantic_cache_threshold', 0.95)
+            )
+        self._semantic_cache = semantic_cache
+        
         # Set default headers
         self.session.headers.update({
             "Content-Type": "application/json",
@@ -57,55 +119,191 @@ class RAGClient:
         Raises:
             RAGClientError: If the request fails or returns an error.
         """
+        # Serve repeated questions from the cache (bypassed in debug mode to keep full request logging)
+        cache_key = self._cache_key(question, k)
+        vector = None
+        if not self._debug:
+            cached, vector = self._get_cached(question, k, cache_key)
+            if cached is not None:
+                return cached
+        
+        # Coalesce concurrent identical requests: the first caller fetches, the rest wait on its result
+        with self._inflight_lock:
+            inflight = self._inflight.get(cache_key)
+            if inflight is None:
+                future: Future = Future()
+                self._inflight[cache_key] = future
+        if inflight is not None:
+            logger.info("Waiting on in-flight RAG request for identical question")
+            return inflight.result()
+        
         try:
-            # Prepare request payload for the real API
-            payload = {
-                "questions": [question]
-            }
+            rag_response = self._fetch([question], k)[0]
+            if not self._debug:
+                self._store_cached(question, k, cache_key, rag_response, vector)
+            future.set_result(rag_response)
+            return rag_response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[cache_key]
+    
+    def retrieve_chunks_batch(self, questions: List[str], k: int = 6) -> List[RAGResponse]:
+        """Retrieve relevant KB chunks for several questions in a single request.
+        
+        Cached and duplicate questions are resolved locally; the remaining
+        questions are sent together in one call. Backends without batch support
+        fall back to retrieve_chunks_many.
+        
+        Args:
+            questions: The questions to get KB chunks for.
+            k: Number of chunks to retrieve per question.
             
-            # Construct the URL with site ID
-            url = f"{self.base_url}/topSegments?siteId={self.site_id}"
+        Returns:
+            List of RAGResponse objects aligned with the input questions.
+            
+        Raises:
+            RAGClientError: If the request fails or returns an error.
+        """
+        if not self.backend.supports_batch:
+            return self.retrieve_chunks_many(questions, k=k)
+        
+        results: List[Optional[RAGResponse]] = [None] * len(questions)
+        pending: Dict[str, List[int]] = {}
+        vectors: Dict[str, Optional[List[float]]] = {}
+        
+        for i, question in enumerate(questions):
+            cache_key = self._cache_key(question, k)
+            if not self._debug and cache_key not in pending:
+                cached, vectors[cache_key] = self._get_cached(question, k, cache_key)
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            pending.setdefault(cache_key, []).append(i)
+        
+        if pending:
+            batch_questions = [questions[indexes[0]] for indexes in pending.values()]
+            rag_responses = self._fetch(batch_questions, k)
+            
+            for (cache_key, indexes), question, rag_response in zip(pending.items(), batch_questions, rag_responses):
+                if not self._debug:
+                    self._store_cached(question, k, cache_key, rag_response, vectors.get(cache_key))
+                for i in indexes:
+                    results[i] = rag_response
+        
+        return results
+    
+    def retrieve_chunks_many(self, questions: List[str], k: int = 6,
+                             return_exceptions: bool = False) -> List[Union[RAGResponse, RAGClientError]]:
+        """Retrieve relevant KB chunks for several questions with concurrent requests.
+        
+        Fallback for RAG backends that do not accept batched questions: one
+        request per question, at most max_concurrency in flight at once.
+        
+        Args:
+            questions: The questions to get KB chunks for.
+            k: Number of chunks to retrieve per question.
+            return_exceptions: Put a failed question's RAGClientError in its slot
+                instead of raising, so one failure doesn't discard the other results.
+            
+        Returns:
+            List of RAGResponse objects (or errors, with return_exceptions) aligned
+            with the input questions.
+            
+        Raises:
+            RAGClientError: If any request fails and return_exceptions is False.
+        """
+        def retrieve(question: str) -> Union[RAGResponse, RAGClientError]:
+            try:
+                return self.retrieve_chunks(question, k=k)
+            except RAGClientError as e:
+                if not return_exceptions:
+                    raise
+                return e
+        
+        if len(questions) <= 1:
+            return [retrieve(question) for question in questions]
+        
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_concurrency,
+                        thread_name_prefix="rag-client"
+                    )
+        
+        return list(self._executor.map(retrieve, questions))
+    
+    def _fetch(self, questions: List[str], k: int) -> List[RAGResponse]:
+        """Send questions to the RAG backend in one request and transform the results.
+        
+        Args:
+            questions: The questions to send in one request.
+            k: Number of chunks to retrieve per question.
+            
+        Returns:
+            List of RAGResponse objects aligned with the questions.
+            
+        Raises:
+            RAGClientError: If the request fails or returns an error.
+        """
+        try:
+            url, payload = self.backend.build_request(self.base_url, self.site_id, questions, k)
             
             # Log RAG request details (debug mode only)
-            if self.settings.debug:
-                logger.info("🔄 RAG SERVICE REQUEST (DEBUG MODE):")
-                logger.info(f"  URL: {url}")
-                logger.info(f"  Method: POST")
-                logger.info(f"  Token: {self.token[:8]}...")
-                logger.info(f"  Site ID: {self.site_id}")
-                logger.info(f"  Request Data: {payload}")
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug("🔄 RAG SERVICE REQUEST (DEBUG MODE):")
+                logger.debug("  URL: %s", url)
+                logger.debug("  Method: POST")
+                logger.debug("  Token: %s...", self.token[:8])
+                logger.debug("  Site ID: %s", self.site_id)
+                logger.debug("  Request Data: %s", payload)
             
+            # Session headers already declare the JSON content type
             response = self.session.post(
                 url,
-                json=payload,
+                data=orjson.dumps(payload),
                 timeout=self.timeout
             )
             
             response.raise_for_status()
             
-            # Parse the real API response
-            response_json = response.json()
+            # Parse the API response
+            response_json = orjson.loads(response.content)
             
             # Log RAG response details (debug mode only)
-            if self.settings.debug:
-                logger.info("✅ RAG SERVICE RESPONSE (DEBUG MODE):")
-                logger.info(f"  Status Code: {response.status_code}")
-                logger.info(f"  Response Size: {len(str(response_json))} characters")
-                logger.info(f"  Response Structure: {type(response_json)}")
-            
-            # Transform the real API response to our internal format
-            rag_response = self._transform_response(question, response_json)
-            
-            if self.settings.debug:
-                logger.info(f"  Number of chunks returned: {len(rag_response.chunks)}")
-                logger.info(f"  Question processed: {rag_response.question}")
-                
-                for i, chunk in enumerate(rag_response.chunks):
-                    logger.info(f"    Chunk {i+1} (confidence: {chunk.confidence:.2f}): {chunk.content[:80]}..." if len(chunk.content) > 80 else f"    Chunk {i+1} (confidence: {chunk.confidence:.2f}): {chunk.content}")
-            else:
-                logger.info(f"RAG service returned {len(rag_response.chunks)} chunks")
+            if debug:
+                logger.debug("✅ RAG SERVICE RESPONSE (DEBUG MODE):")
+                logger.debug("  Status Code: %s", response.status_code)
+                logger.debug("  Response Size: %d bytes", len(response.content))
+                logger.debug("  Response Structure: %s", type(response_json))
             
-            return rag_response
+            # Transform the API response to our internal format
+            try:
+                rag_responses = self.backend.parse(questions, response_json)
+            except ValueError as e:
+                raise RAGClientError(str(e)) from e
+            
+            for rag_response in rag_responses:
+                if debug:
+                    logger.debug("  Number of chunks returned: %d", len(rag_response.chunks))
+                    logger.debug("  Question processed: %s", rag_response.question)
+                    
+                    for i, chunk in enumerate(rag_response.chunks):
+                        content = chunk.content
+                        preview = content if len(content) <= 80 else content[:80] + "..."
+                        logger.debug("    Chunk %d (confidence: %.2f): %s", i + 1, chunk.confidence, preview)
+                else:
+                    logger.info("RAG service returned %d chunks", len(rag_response.chunks))
+            
+            return rag_responses
+            
+        except RAGClientError as e:
+            logger.error(str(e))
+            raise
             
         except ConnectionError as e:
             error_msg = f"Failed to connect to RAG service at {self.base_url}: {e}"
@@ -127,59 +325,137 @@ class RAGClient:
             logger.error(error_msg)
             raise RAGClientError(error_msg) from e
     
-    def _transform_response(self, question: str, api_response: List[dict]) -> RAGResponse:
-        """Transform the real API response to our internal format.
+    def _get_cached(self, question: str, k: int,
+                    cache_key: str) -> Tuple[Optional[RAGResponse], Optional[List[float]]]:
+        """Look up a question in the exact-match and semantic caches.
+        
+        Returns:
+            The cached response or None, and the question's semantic cache
+            embedding (if one was computed) for passing on to _store_cached.
+        """
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            logger.info("RAG cache hit for question")
+            return cached, None
+        vector = self._semantic_vectorize(question)
+        cached = self._semantic_lookup(question, k, vector)
+        if cached is not None:
+            logger.info("RAG semantic cache hit for question")
+            # The hit was stored for a paraphrase; answer with the question actually asked
+            cached = cached.model_copy(update={"question": question})
+            self._cache.set(cache_key, cached)
+        return cached, vector
+    
+    def _store_cached(self, question: str, k: int, cache_key: str,
+                      rag_response: RAGResponse, vector: Optional[List[float]] = None) -> None:
+        """Store a fresh response in the exact-match and semantic caches."""
+        self._cache.set(cache_key, rag_response)
+        self._semantic_store(question, k, rag_response, vector)
+    
+    def _cache_key(self, question: str, k: int) -> str:
+        """Build the cache key for a question.
         
         Args:
-            question: The original question.
-            api_response: The response from the real API.
+            question: The question to get KB chunks for.
+            k: Number of chunks to retrieve.
             
         Returns:
-            RAGResponse: Transformed response in our internal format.
+            Hex digest of site ID, normalized question and k.
         """
-        chunks = []
-        formatted_chunks = []
-        
-        # Process the API response structure
-        for item in api_response:
-            if "topSegments" in item:
-                for segment in item["topSegments"]:
-                    # Create KBChunk from segment data
-                    chunk = KBChunk(
-                        content=segment.get("segment", ""),
-                        source=segment.get("file", "Unknown"),
-                        confidence=segment.get("score", 0.0)
-                    )
-                    chunks.append(chunk)
-                    
-                    # Create formatted chunk with source citation
-                    formatted_chunk = f"{chunk.content} (source: {chunk.source})"
-                    formatted_chunks.append(formatted_chunk)
-        
-        return RAGResponse(
-            question=question,
-            chunks=chunks,
-            formatted_chunks=formatted_chunks
-        )
+        normalized = _WHITESPACE_RE.sub(" ", question.strip().lower())
+        return hashlib.sha256(f"{self.site_id}:{normalized}:{k}".encode()).hexdigest()
+    
+    def _semantic_vectorize(self, question: str) -> Optional[List[float]]:
+        """Embed a question once for both semantic cache lookup and store, if enabled."""
+        if self._semantic_cache is None:
+            return None
+        try:
+            return self._semantic_cache.vectorize(question)
+        except Exception as e:
+            logger.warning("RAG semantic cache embedding failed: %s", e)
+            return None
+    
+    def _semantic_lookup(self, question: str, k: int,
+                         vector: Optional[List[float]]) -> Optional[RAGResponse]:
+        """Look up a paraphrased question in the semantic cache, if enabled."""
+        if self._semantic_cache is None or vector is None:
+            return None
+        try:
+            return self._semantic_cache.get(question, namespace=(k, self.site_id), vector=vector)
+        except Exception as e:
+            logger.warning("RAG semantic cache lookup failed: %s", e)
+            return None
+    
+    def _semantic_store(self, question: str, k: int, rag_response: RAGResponse,
+                        vector: Optional[List[float]] = None) -> None:
+        """Store a response in the semantic cache, if enabled."""
+        if self._semantic_cache is None:
+            return
+        try:
+            self._semantic_cache.set(question, rag_response, namespace=(k, self.site_id), vector=vector)
+        except Exception as e:
+            logger.warning("RAG semantic cache store failed: %s", e)
+    
+    def clear_cache(self) -> None:
+        """Clear cached RAG responses and reset cache statistics."""
+        self._cache.clear()
+        if self._semantic_cache is not None:
+            self._semantic_cache.clear()
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Get RAG response cache statistics.
+        
+        Returns:
+            Dictionary with hits, misses and current size.
+        """
+        return self._cache.stats()
+    
+    def close(self) -> None:
+        """Close the HTTP session and release pooled connections."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self.session.close()
     
     def health_check(self) -> bool:
         """Check if the RAG service is healthy.
         
+        Results are memoized for health_check_ttl seconds so frequent /health
+        polling doesn't turn into a stream of backend requests.
+        
         Returns:
             bool: True if the service is healthy, False otherwise.
         """
+        now = time.monotonic()
+        if self._last_health_ts and now - self._last_health_ts < self.health_check_ttl:
+            return self._last_health_ok
+        
         try:
-            # For the real API, we'll do a simple test request
-            test_payload = {"questions": ["test"]}
-            url = f"{self.base_url}/topSegments?siteId={self.site_id}"
-            
-            response = self.session.post(
-                url,
-                json=test_payload,
-                timeout=5  # Short timeout for health checks
-            )
-            return response.status_code == 200
+            healthy = self.backend.health_check(self.session, self.base_url, self.site_id)
             
         except Exception as e:
-            logger.warning(f"RAG service health check failed: {e}")
-            return False 
\ No newline at end of file
+            logger.warning("RAG service health check failed: %s", e)
+            healthy = False
+        
+        self._last_health_ts = time.monotonic()
+        self._last_health_ok = healthy
+        return healthy
+
+
+# Process-wide client so every caller shares one Session and connection pool
+_client: Optional[RAGClient] = None
+_client_lock = threading.Lock()
+
+
+def get_rag_client() -> RAGClient:
+    """Return the shared RAG client, creating it on first use.
+    
+    Returns:
+        RAGClient: The process-wide RAG client instance.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = RAGClient()
+    return _client
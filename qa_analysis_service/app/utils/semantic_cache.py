@@ -0,0 +1,171 @@
+"""Embedding-similarity cache for paraphrased questions."""
+import logging
+import math
+import random
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+Embedder = Callable[[str], Sequence[float]]
+
+_models: Dict[str, Any] = {}
+_models_lock = threading.Lock()
+
+
+def sentence_transformer_embedder(model_name: str = "sentence-transformers/all-MiniLM-L6-v2") -> Embedder:
+    """Create an embedder backed by a lazily loaded sentence-transformers model.
+
+    The model is loaded on first use and shared by every embedder for the same name.
+
+    Args:
+        model_name: The sentence-transformers model to load.
+
+    Returns:
+        A function mapping text to an embedding vector.
+    """
+    def embed(text: str) -> Sequence[float]:
+        model = _models.get(model_name)
+        if model is None:
+            with _models_lock:
+                model = _models.get(model_name)
+                if model is None:
+                    # Imported lazily: sentence-transformers is only needed when the semantic cache is enabled
+                    from sentence_transformers import SentenceTransformer
+                    logger.info("Loading embedding model %s", model_name)
+                    model = SentenceTransformer(model_name, device="cpu")
+                    _models[model_name] = model
+        return model.encode(text, convert_to_numpy=True).tolist()
+
+    return embed
+
+
+class SemanticCache:
+    """LRU cache that returns values stored for semantically similar texts.
+
+    Embeddings are bucketed by a random-projection LSH signature; within a bucket
+    the closest stored vector is returned when its cosine similarity meets the threshold.
+    """
+
+    def __init__(self, embed: Embedder, threshold: float = 0.95, maxsize: int = 2048,
+                 n_bits: int = 16, seed: int = 0):
+        """Initialize the semantic cache.
+
+        Args:
+            embed: Function mapping text to an embedding vector.
+            threshold: Minimum cosine similarity for a cache hit.
+            maxsize: Maximum number of entries before the least recently used is evicted.
+            n_bits: Number of random hyperplanes in the LSH signature.
+            seed: Seed for the random hyperplanes.
+        """
+        self.embed = embed
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.n_bits = n_bits
+        self.seed = seed
+        self._planes: Optional[List[List[float]]] = None
+        self._entries: "OrderedDict[int, Tuple[Hashable, List[float], Any]]" = OrderedDict()
+        self._buckets: Dict[Hashable, List[int]] = {}
+        self._next_id = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def vectorize(self, text: str) -> List[float]:
+        """Embed and normalize text, for reuse across a get and a later set.
+
+        Args:
+            text: The text to embed.
+
+        Returns:
+            The unit-length embedding of text.
+        """
+        return self._normalize(self.embed(text))
+
+    def get(self, text: str, namespace: Hashable = None,
+            vector: Optional[List[float]] = None) -> Optional[Any]:
+        """Return the value stored for the most similar text, if similar enough.
+
+        Args:
+            text: The text to look up.
+            namespace: Only entries stored under the same namespace are considered.
+            vector: Precomputed result of vectorize(text), to skip embedding.
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        if vector is None:
+            vector = self.vectorize(text)
+        with self._lock:
+            bucket = self._bucket_key(vector, namespace)
+            best_id, best_score = None, -1.0
+            for entry_id in self._buckets.get(bucket, ()):
+                score = sum(a * b for a, b in zip(vector, self._entries[entry_id][1]))
+                if score > best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is not None and best_score >= self.threshold:
+                self._entries.move_to_end(best_id)
+                self.hits += 1
+                return self._entries[best_id][2]
+            self.misses += 1
+            return None
+
+    def set(self, text: str, value: Any, namespace: Hashable = None,
+            vector: Optional[List[float]] = None) -> None:
+        """Store a value under the embedding of text.
+
+        Args:
+            text: The text whose embedding keys the value.
+            value: The value to store.
+            namespace: Namespace the entry belongs to.
+            vector: Precomputed result of vectorize(text), to skip embedding.
+        """
+        if vector is None:
+            vector = self.vectorize(text)
+        with self._lock:
+            bucket = self._bucket_key(vector, namespace)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (bucket, vector, value)
+            self._buckets.setdefault(bucket, []).append(entry_id)
+            while len(self._entries) > self.maxsize:
+                old_id, (old_bucket, _, _) = self._entries.popitem(last=False)
+                ids = self._buckets[old_bucket]
+                ids.remove(old_id)
+                if not ids:
+                    del self._buckets[old_bucket]
+
+    def clear(self) -> None:
+        """Remove all entries and reset the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache statistics.
+
+        Returns:
+            Dictionary with hits, misses and current size.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _bucket_key(self, vector: List[float], namespace: Hashable) -> Hashable:
+        """Compute the LSH bucket for a normalized vector."""
+        if self._planes is None:
+            rng = random.Random(self.seed)
+            self._planes = [[rng.gauss(0.0, 1.0) for _ in vector] for _ in range(self.n_bits)]
+        signature = 0
+        for plane in self._planes:
+            signature = (signature << 1) | (sum(a * b for a, b in zip(vector, plane)) > 0)
+        return (namespace, signature)
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> List[float]:
+        """Scale a vector to unit length so dot products are cosine similarities."""
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
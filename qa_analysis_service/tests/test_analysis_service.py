@@ -1,4 +1,5 @@
 """Tests for the QA Analysis Service."""
+import threading
 import pytest
 from datetime import datetime
 from unittest.mock import Mock, patch
@@ -14,17 +15,78 @@ from app.models.analysis import (
     RAGResponse,
     KBChunk
 )
+from app.config import settings
 from app.services.analysis_service import AnalysisService
-from app.services.rag_client import RAGClient
 from app.services.llm_client import LLMClient
+from app.services.rag_client import RAGClientError
 
+pytestmark = pytest.mark.unit
 
-@pytest.fixture
+
+# Timestamps are not used by the analysis pipeline; a constant keeps test data deterministic
+_FIXED_TS = datetime(2024, 1, 1)
+
+_SAMPLE_CONVERSATION = Conversation(
+    id=12345,
+    type="chat",
+    messages=[
+        Message(
+            id="1",
+            role="customer",
+            content="How do I filter unpaid invoices?",
+            timestamp=_FIXED_TS
+        ),
+        Message(
+            id="2",
+            role="agent",
+            content="Use the Status dropdown and select Unpaid.",
+            timestamp=_FIXED_TS
+        )
+    ]
+)
+
+_FALLBACK_CONVERSATION = Conversation(
+    id=1,
+    type="chat",
+    messages=[
+        Message(id="1", role="customer", content="Test question?", timestamp=_FIXED_TS),
+        Message(id="2", role="agent", content="Test answer.", timestamp=_FIXED_TS)
+    ]
+)
+
+_MULTI_QA_CONVERSATION = Conversation(
+    id=1,
+    type="chat",
+    messages=[
+        Message(id="1", role="customer", content="Q1", timestamp=_FIXED_TS),
+        Message(id="2", role="agent", content="A1", timestamp=_FIXED_TS),
+        Message(id="3", role="customer", content="Q2", timestamp=_FIXED_TS),
+        Message(id="4", role="agent", content="A2", timestamp=_FIXED_TS)
+    ]
+)
+
+
+class _StubRAGClient:
+    """RAG client stand-in that returns the same response for every question."""
+    
+    def __init__(self, rag_response: RAGResponse):
+        self.rag_response = rag_response
+    
+    def retrieve_chunks(self, question, k=6):
+        return self.rag_response
+    
+    def retrieve_chunks_batch(self, questions, k=6):
+        return [self.rag_response] * len(questions)
+    
+    def retrieve_chunks_many(self, questions, k=6, return_exceptions=False):
+        return [self.rag_response] * len(questions)
+
+
+@pytest.fixture(scope="module")
 def mock_rag_client():
-    """Create a mock RAG client."""
-    client = Mock(spec=RAGClient)
-    # Mock response for retrieve_chunks
-    client.retrieve_chunks.return_value = RAGResponse(
+    """Create a stub RAG client shared by the tests in this module."""
+    # Fixed response for every retrieval
+    rag_response = RAGResponse(
         question="How do I filter unpaid invoices?",
         chunks=[
             KBChunk(
@@ -32,18 +94,22 @@ def mock_rag_client():
                 source="billing/invoices.md",
                 confidence=0.95
             )
-        ],
-        formatted_chunks=[
-            "On the Invoices page, use the Status dropdown to choose Unpaid. (source: billing/invoices.md)"
         ]
     )
-    return client
+    return _StubRAGClient(rag_response)
+
+
+@pytest.fixture(scope="module")
+def llm_client_factory():
+    """Create the LLM client mock once per module."""
+    return Mock(spec=LLMClient)
 
 
-@pytest.fixture
-def mock_llm_client():
-    """Create a mock LLM client."""
-    client = Mock(spec=LLMClient)
+@pytest.fixture(autouse=True)
+def mock_llm_client(llm_client_factory):
+    """Reset the shared mock LLM client and queue fresh stage responses before every test."""
+    client = llm_client_factory
+    client.reset_mock()
     
     # Mock Stage 1 response (thread segmentation)
     client.chat_completion_json.side_effect = [
@@ -79,33 +145,22 @@ def mock_llm_client():
     return client
 
 
-@pytest.fixture
-def analysis_service(mock_rag_client, mock_llm_client):
-    """Create an analysis service with mocked dependencies."""
-    return AnalysisService(rag_client=mock_rag_client, llm_client=mock_llm_client)
+@pytest.fixture(scope="module")
+def analysis_service(mock_rag_client, llm_client_factory):
+    """Create one analysis service with mocked dependencies for the module.
+    
+    The autouse mock_llm_client fixture resets the shared LLM mock before each test.
+    """
+    service = AnalysisService(rag_client=mock_rag_client, llm_client=llm_client_factory)
+    yield service
+    if service._executor is not None:
+        service._executor.shutdown(wait=True)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_conversation():
-    """Create a sample conversation for testing."""
-    return Conversation(
-        id=12345,
-        type="chat",
-        messages=[
-            Message(
-                id="1",
-                role="customer",
-                content="How do I filter unpaid invoices?",
-                timestamp=datetime.utcnow()
-            ),
-            Message(
-                id="2",
-                role="agent",
-                content="Use the Status dropdown and select Unpaid.",
-                timestamp=datetime.utcnow()
-            )
-        ]
-    )
+    """Provide the sample conversation for testing."""
+    return _SAMPLE_CONVERSATION
 
 
 def test_stage1_segment_conversation(analysis_service, sample_conversation):
@@ -181,32 +236,41 @@ def test_fallback_when_llm_fails(mock_rag_client):
     
     service = AnalysisService(rag_client=mock_rag_client, llm_client=failing_llm)
     
-    conversation = Conversation(
-        id=1,
-        type="chat",
-        messages=[
-            Message(id="1", role="customer", content="Test question?", timestamp=datetime.utcnow()),
-            Message(id="2", role="agent", content="Test answer.", timestamp=datetime.utcnow())
-        ]
-    )
-    
     # Should fall back to simple extraction
-    threads = service._stage1_segment_conversation(conversation)
+    threads = service._stage1_segment_conversation(_FALLBACK_CONVERSATION)
     assert len(threads) == 1
     assert threads[0].question == "Test question?"
 
 
+def test_failed_rag_batch_falls_back_per_question(mock_rag_client, monkeypatch):
+    """Test that a failed batched RAG call only empties the KB chunks of questions that fail alone."""
+    monkeypatch.setattr(settings, "rag_batch_questions", True)
+    rag_client = Mock()
+    rag_client.retrieve_chunks_batch.side_effect = RAGClientError("batch failed")
+    rag_client.retrieve_chunks_many.return_value = [
+        mock_rag_client.rag_response,
+        RAGClientError("question failed")
+    ]
+    service = AnalysisService(rag_client=rag_client, llm_client=Mock(spec=LLMClient))
+    
+    kb_chunks = service._retrieve_kb_chunks_batch(["Q1", "Q2"])
+    
+    assert kb_chunks == [mock_rag_client.rag_response.formatted_chunks, []]
+    rag_client.retrieve_chunks_many.assert_called_once_with(["Q1", "Q2"], k=6, return_exceptions=True)
+
+
 def test_empty_conversation():
     """Test handling of empty conversations."""
     service = AnalysisService()
     
-    empty_conv = Conversation(
+    # Build models without validation: this test covers service logic, not the request schema
+    empty_conv = Conversation.model_construct(
         id=1,
         type="chat",
         messages=[]
     )
     
-    request = AnalysisRequest(
+    request = AnalysisRequest.model_construct(
         conversation=empty_conv,
         integratedKbId="kb_001"
     )
@@ -230,17 +294,8 @@ def test_out_of_scope_scoring():
     
     service = AnalysisService(llm_client=mock_llm)
     
-    # Create conversation with multiple Q&A pairs
-    conversation = Conversation(
-        id=1,
-        type="chat",
-        messages=[
-            Message(id="1", role="customer", content="Q1", timestamp=datetime.utcnow()),
-            Message(id="2", role="agent", content="A1", timestamp=datetime.utcnow()),
-            Message(id="3", role="customer", content="Q2", timestamp=datetime.utcnow()),
-            Message(id="4", role="agent", content="A2", timestamp=datetime.utcnow())
-        ]
-    )
+    # Conversation with multiple Q&A pairs
+    conversation = _MULTI_QA_CONVERSATION
     
     # Need to mock multiple analyze calls
     with patch.object(service, '_stage1_segment_conversation') as mock_stage1:
@@ -253,4 +308,38 @@ def test_out_of_scope_scoring():
         response = service.analyze_conversation(request)
         
         # Overall accuracy should only include score >= 0 (exclude -1)
-        assert response.overallAccuracy == 5.0  # Only the score of 5 is counted 
\ No newline at end of file
+        assert response.overallAccuracy == 5.0  # Only the score of 5 is counted 
+
+
+def test_analyze_conversation_rates_many_threads_concurrently(mock_rag_client, mock_llm_client):
+    """Test that long conversations rate threads on the pool and keep thread order."""
+    service = AnalysisService(rag_client=mock_rag_client, llm_client=mock_llm_client)
+    threads = [ConversationThread(qid=f"T{i}", question=f"Q{i}", answer=f"A{i}") for i in range(5)]
+    service.max_concurrency = len(threads)
+    # Every rating blocks until all of them are running, so a serial run breaks the barrier
+    barrier = threading.Barrier(len(threads), timeout=5)
+    worker_names = set()
+    
+    def rate(thread, kb_id, kb_chunks):
+        worker_names.add(threading.current_thread().name)
+        barrier.wait()
+        return QuestionRating(
+            aiRewrittenQuestion=thread.question,
+            agentAnswer=thread.answer,
+            aiSuggestedAnswer="",
+            aiScore=4.0,
+            aiRationale=""
+        )
+    
+    try:
+        with patch.object(service, '_stage1_segment_conversation', return_value=threads), \
+                patch.object(service, '_rate_thread', side_effect=rate):
+            request = AnalysisRequest(conversation=_SAMPLE_CONVERSATION, integratedKbId="kb_001")
+            response = service.analyze_conversation(request)
+    finally:
+        if service._executor is not None:
+            service._executor.shutdown(wait=True)
+    
+    assert [r.aiRewrittenQuestion for r in response.questionRatings] == ["Q0", "Q1", "Q2", "Q3", "Q4"]
+    assert len(worker_names) == len(threads)
+    assert all(name.startswith("analysis") for name in worker_names)
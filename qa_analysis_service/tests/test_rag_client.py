@@ -0,0 +1,227 @@
+"""Tests for the RAG client."""
+import threading
+import time
+
+import orjson
+import pytest
+import requests
+from unittest.mock import Mock
+
+from app.config import settings
+from app.models.analysis import RAGResponse
+from app.services.rag_backends import RetrieveChunksBackend, TopSegmentsBackend
+from app.services.rag_cache import InMemoryRAGCache
+from app.services.rag_client import RAGClient, RAGClientError
+from app.utils.semantic_cache import SemanticCache
+
+pytestmark = pytest.mark.unit
+
+
+SAMPLE_API_RESPONSE = [
+    {
+        "question": "How do I filter unpaid invoices?",
+        "topSegments": [
+            {
+                "segment": "On the Invoices page, use the Status dropdown to choose Unpaid.",
+                "file": "billing/invoices.md",
+                "score": 0.95
+            }
+        ]
+    }
+]
+
+
+@pytest.fixture
+def rag_client(monkeypatch):
+    """Create a RAG client with a mocked HTTP session.
+    
+    The backend and cache are passed explicitly and debug mode and the semantic
+    cache are switched off, so results don't depend on the local environment.
+    """
+    monkeypatch.setattr(settings, "debug", False)
+    monkeypatch.setattr(settings, "rag_semantic_cache", False)
+    client = RAGClient(
+        base_url="http://rag.test",
+        token="test-token",
+        site_id="1",
+        cache=InMemoryRAGCache(),
+        backend=TopSegmentsBackend()
+    )
+    response = Mock(status_code=200, content=orjson.dumps(SAMPLE_API_RESPONSE))
+    client.session = Mock()
+    client.session.post.return_value = response
+    client.session.options.return_value = Mock(status_code=405)
+    return client
+
+
+def test_retrieve_chunks_transforms_response(rag_client):
+    """Test that topSegments are mapped to KB chunks."""
+    result = rag_client.retrieve_chunks("How do I filter unpaid invoices?")
+
+    assert isinstance(result, RAGResponse)
+    assert len(result.chunks) == 1
+    assert result.chunks[0].source == "billing/invoices.md"
+    assert result.formatted_chunks == [
+        "On the Invoices page, use the Status dropdown to choose Unpaid. (source: billing/invoices.md)"
+    ]
+
+
+def test_retrieve_chunks_uses_cache_for_repeated_questions(rag_client):
+    """Test that normalized repeat questions are served from the cache."""
+    first = rag_client.retrieve_chunks("How do I filter unpaid invoices?")
+    second = rag_client.retrieve_chunks("  how do I   filter unpaid invoices?")
+
+    assert second is first
+    assert rag_client.session.post.call_count == 1
+    assert rag_client.cache_stats()["hits"] == 1
+
+    rag_client.clear_cache()
+    rag_client.retrieve_chunks("How do I filter unpaid invoices?")
+    assert rag_client.session.post.call_count == 2
+
+
+def test_retrieve_chunks_bypasses_cache_in_debug_mode(rag_client):
+    """Test that debug mode always hits the RAG service."""
+    rag_client._debug = True
+
+    rag_client.retrieve_chunks("How do I filter unpaid invoices?")
+    rag_client.retrieve_chunks("How do I filter unpaid invoices?")
+
+    assert rag_client.session.post.call_count == 2
+
+
+def test_retrieve_chunks_uses_semantic_cache_for_paraphrases(rag_client):
+    """Test that a paraphrase close enough in embedding space skips the HTTP call."""
+    vectors = {
+        "where are unpaid invoices": [1.0, 0.0, 0.1],
+        "how do i find unpaid bills": [1.0, 0.0, 0.12],
+    }
+    embedded = []
+
+    def embed(text):
+        embedded.append(text)
+        return vectors[text]
+
+    rag_client._semantic_cache = SemanticCache(embed, threshold=0.95, n_bits=4)
+
+    first = rag_client.retrieve_chunks("where are unpaid invoices")
+    second = rag_client.retrieve_chunks("how do i find unpaid bills")
+
+    assert second.chunks == first.chunks
+    assert second.question == "how do i find unpaid bills"
+    assert embedded == ["where are unpaid invoices", "how do i find unpaid bills"]
+    assert rag_client.session.post.call_count == 1
+
+
+def test_retrieve_chunks_batch_sends_one_request(rag_client):
+    """Test that uncached questions are sent together and results stay aligned."""
+    rag_client.session.post.return_value.content = orjson.dumps([
+        {"question": "Q1", "topSegments": [{"segment": "A1", "file": "a.md", "score": 0.9}]},
+        {"question": "Q2", "topSegments": [{"segment": "A2", "file": "b.md", "score": 0.8}]}
+    ])
+
+    results = rag_client.retrieve_chunks_batch(["Q1", "Q2", "q1"])
+
+    assert rag_client.session.post.call_count == 1
+    assert orjson.loads(rag_client.session.post.call_args.kwargs["data"]) == {"questions": ["Q1", "Q2"]}
+    assert [r.chunks[0].content for r in results] == ["A1", "A2", "A1"]
+
+
+def test_retrieve_chunks_many_keeps_input_order(rag_client):
+    """Test that concurrent per-question retrieval returns results in input order."""
+    def post(url, data, timeout):
+        question = orjson.loads(data)["questions"][0]
+        return Mock(status_code=200, content=orjson.dumps([
+            {"question": question, "topSegments": [{"segment": question, "file": "f.md", "score": 0.5}]}
+        ]))
+    rag_client.session.post.side_effect = post
+
+    results = rag_client.retrieve_chunks_many(["Q1", "Q2", "Q3"])
+
+    assert [r.chunks[0].content for r in results] == ["Q1", "Q2", "Q3"]
+    assert rag_client.session.post.call_count == 3
+
+
+def test_retrieve_chunks_many_can_return_errors_in_place(rag_client):
+    """Test that one failed question doesn't discard the other questions' results."""
+    def post(url, data, timeout):
+        question = orjson.loads(data)["questions"][0]
+        if question == "Q2":
+            raise requests.ConnectionError("connection reset")
+        return Mock(status_code=200, content=orjson.dumps([
+            {"question": question, "topSegments": [{"segment": question, "file": "f.md", "score": 0.5}]}
+        ]))
+    rag_client.session.post.side_effect = post
+
+    results = rag_client.retrieve_chunks_many(["Q1", "Q2", "Q3"], return_exceptions=True)
+
+    assert results[0].chunks[0].content == "Q1"
+    assert isinstance(results[1], RAGClientError)
+    assert results[2].chunks[0].content == "Q3"
+    with pytest.raises(RAGClientError):
+        rag_client.retrieve_chunks_many(["Q2", "Q4"])
+
+
+def test_health_check_is_memoized(rag_client):
+    """Test that health results are reused within the TTL."""
+    assert rag_client.health_check() is True
+    assert rag_client.health_check() is True
+    assert rag_client.session.options.call_count == 1
+    assert rag_client.session.post.call_count == 0
+
+    rag_client.health_check_ttl = 0
+    rag_client.session.options.return_value = Mock(status_code=503)
+    assert rag_client.health_check() is False
+    rag_client.session.options.return_value = Mock(status_code=401)
+    assert rag_client.health_check() is False
+
+
+def test_retrieve_chunks_coalesces_concurrent_identical_requests(rag_client):
+    """Test that identical in-flight questions share one HTTP request."""
+    release = threading.Event()
+    response = rag_client.session.post.return_value
+
+    def slow_post(url, data, timeout):
+        release.wait(timeout=5)
+        return response
+    rag_client.session.post.side_effect = slow_post
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(rag_client.retrieve_chunks("How do I filter unpaid invoices?")))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    while not rag_client._inflight:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert rag_client.session.post.call_count == 1
+    assert len(results) == 3
+    assert all(result is results[0] for result in results)
+
+
+def test_retrieve_chunks_backend_sends_one_request_per_question(rag_client):
+    """Test that the retrieve-chunks backend posts single questions and parses its schema."""
+    rag_client.backend = RetrieveChunksBackend()
+
+    def post(url, data, timeout):
+        question = orjson.loads(data)["question"]
+        return Mock(status_code=200, content=orjson.dumps({
+            "question": question,
+            "chunks": [{"content": question, "source": "f.md", "confidence": 0.5}],
+            "formatted_chunks": [f"{question} (source: f.md)"]
+        }))
+    rag_client.session.post.side_effect = post
+
+    results = rag_client.retrieve_chunks_batch(["Q1", "Q2"], k=3)
+
+    assert [r.chunks[0].content for r in results] == ["Q1", "Q2"]
+    assert rag_client.session.post.call_count == 2
+    url = rag_client.session.post.call_args.args[0]
+    assert url == "http://rag.test/retrieve-chunks"
+    assert orjson.loads(rag_client.session.post.call_args.kwargs["data"])["k"] == 3
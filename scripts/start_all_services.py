@@ -5,98 +5,179 @@ import sys
 import time
 import signal
 import os
-from concurrent.futures import ThreadPoolExecutor
+import selectors
+from typing import Dict, List, Optional, Tuple
 
 
-def run_service(command: str, name: str, cwd: str = None):
-    """Run a service in a subprocess.
-    
+def start_service(command: List[str], name: str, cwd: str = None,
+                  env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    """Start a service in a subprocess.
+
+    The service is exec'd directly (no intermediate shell) as the leader of a
+    new process group, so it and any children can be stopped with one killpg.
+
     Args:
-        command: Command to run.
+        command: Program and arguments to run.
         name: Service name for logging.
         cwd: Working directory.
+        env: Extra environment variables for the service.
+
+    Returns:
+        The running service process, with stdout and stderr merged into one pipe.
     """
     print(f"Starting {name}...")
-    
-    try:
-        process = subprocess.Popen(
-            command,
-            shell=True,
-            cwd=cwd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            bufsize=1
-        )
-        
-        # Stream output with service name prefix
-        for line in iter(process.stdout.readline, ''):
-            if line.strip():
-                print(f"[{name}] {line.strip()}")
-        
-        process.wait()
-        
-    except KeyboardInterrupt:
-        print(f"\n{name} interrupted by user")
-        process.terminate()
+
+    return subprocess.Popen(
+        command,
+        cwd=cwd,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        bufsize=-1,
+        start_new_session=True
+    )
+
+
+def stop_services(services: List[Tuple[str, subprocess.Popen]]):
+    """Send SIGTERM to every running service's process group and wait for them to exit.
+
+    Args:
+        services: (service name, process) pairs.
+    """
+    for name, process in services:
+        if process.poll() is not None:
+            continue
+        print(f"Stopping {name}...")
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass  # Already exited
+    for _, process in services:
         process.wait()
-    except Exception as e:
-        print(f"Error running {name}: {e}")
+
+
+# Buffered service output is written once it reaches this size or age
+_FLUSH_BYTES = 16384
+_FLUSH_INTERVAL = 0.01
+
+
+def _write_output(out: bytearray):
+    """Write buffered service output to stdout in one call."""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(out)
+    sys.stdout.buffer.flush()
+
+
+def pump_output(services: List[Tuple[str, subprocess.Popen]]):
+    """Stream output from all services with a service name prefix until they exit.
+
+    A single selector loop reads raw bytes from every service pipe, so no
+    per-service thread or per-line text decoding is needed. Prefixed lines are
+    batched and written when 16 KiB are pending or the oldest is 10 ms old, so
+    chatty services don't cost a write syscall per read.
+
+    Args:
+        services: (service name, process) pairs.
+    """
+    selector = selectors.DefaultSelector()
+    for name, process in services:
+        # Partial trailing line per service, completed by the next read
+        selector.register(process.stdout, selectors.EVENT_READ, (f"[{name}] ".encode(), bytearray()))
+
+    out = bytearray()
+    buffered_since = 0.0
+    try:
+        while selector.get_map():
+            # Wake up in time to flush pending output even when every service goes quiet
+            timeout = max(0.0, buffered_since + _FLUSH_INTERVAL - time.monotonic()) if out else None
+            for key, _ in selector.select(timeout):
+                prefix, pending = key.data
+                chunk = os.read(key.fd, 65536)
+                if chunk:
+                    pending += chunk
+                    lines = pending.split(b"\n")
+                    pending[:] = lines.pop()
+                else:
+                    # EOF: flush any unterminated last line
+                    lines = [bytes(pending)]
+                    selector.unregister(key.fileobj)
+
+                for line in lines:
+                    line = line.strip()
+                    if line:
+                        if not out:
+                            buffered_since = time.monotonic()
+                        out += prefix + line + b"\n"
+
+            if out and (len(out) >= _FLUSH_BYTES or time.monotonic() - buffered_since >= _FLUSH_INTERVAL):
+                _write_output(out)
+                out.clear()
+    finally:
+        # Don't lose buffered lines on Ctrl+C or when the last service exits
+        if out:
+            _write_output(out)
+        selector.close()
+
+
+def _exit_on_signal(signum, frame):
+    """Turn SIGTERM/SIGHUP into SystemExit so main()'s cleanup runs."""
+    raise SystemExit(128 + signum)
 
 
 def main():
     """Start all services."""
     print("🚀 Starting AI Quality Assurance Development Environment")
     print("=" * 60)
-    
+
     # Get the project root directory (parent of scripts directory)
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.dirname(script_dir)
-    
+
     # Service configurations
     services = [
         {
             "name": "Chat Data Service",
-            "command": "python main.py",
+            "command": [sys.executable, "main.py"],
             "cwd": os.path.join(project_root, "dummy_services", "chat_data_service")
         },
         {
             "name": "QA Analysis Service",
-            "command": "PYTHONPATH=. python app/main.py",
-            "cwd": os.path.join(project_root, "qa_analysis_service")
+            "command": [sys.executable, "app/main.py"],
+            "cwd": os.path.join(project_root, "qa_analysis_service"),
+            "env": {"PYTHONPATH": "."}
         }
     ]
-    
-    # Start services in parallel
+
+    # Services run in their own sessions, so signals sent to this script never reach
+    # them; every way out of main() must go through stop_services
+    signal.signal(signal.SIGTERM, _exit_on_signal)
+    signal.signal(signal.SIGHUP, _exit_on_signal)
+
+    processes = []
     try:
-        with ThreadPoolExecutor(max_workers=len(services)) as executor:
-            futures = []
-            
-            for service in services:
-                future = executor.submit(
-                    run_service,
-                    service["command"],
-                    service["name"],
-                    service["cwd"]
-                )
-                futures.append(future)
-            
-            print("\n📋 Services starting up...")
-            print("   • Chat Data Service: http://localhost:8001")
-            print("   • QA Analysis Service: http://localhost:8000")
-            print("   • Real RAG Service: https://mqapi.testing.comm100dev.io/...")
-            print("\nPress Ctrl+C to stop all services\n")
-            
-            # Wait for all services
-            for future in futures:
-                future.result()
-                
+        for service in services:
+            process = start_service(service["command"], service["name"], service["cwd"], service.get("env"))
+            processes.append((service["name"], process))
+
+        print("\n📋 Services starting up...")
+        print("   • Chat Data Service: http://localhost:8001")
+        print("   • QA Analysis Service: http://localhost:8000")
+        print("   • Real RAG Service: https://mqapi.testing.comm100dev.io/...")
+        print("\nPress Ctrl+C to stop all services\n")
+
+        # Stream output until every service exits
+        pump_output(processes)
+        for _, process in processes:
+            process.wait()
+
     except KeyboardInterrupt:
         print("\n🛑 Shutting down all services...")
-        # Cleanup is handled in individual service functions
-    
-    print("✅ All services stopped")
+    except Exception as e:
+        print(f"Error running services: {e}")
+    finally:
+        stop_services(processes)
+        print("✅ All services stopped")
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
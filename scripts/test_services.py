@@ -1,10 +1,196 @@
 #!/usr/bin/env python3
 """Test script to verify all services are working correctly."""
 import requests
-import json
+import orjson
+import atexit
+import functools
+import io
+import itertools
+import statistics
+import threading
 import time
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+# One keep-alive connection pool for every request in the run, sized for the concurrent checks.
+# Only the external HTTPS RAG call retries transient failures; local services are polled by
+# wait_ready and the analysis POST is too slow to repeat.
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "POST"]),
+        respect_retry_after_header=True
+    )
+))
+atexit.register(SESSION.close)
+
+# Number of KB segments shown from the RAG response
+RAG_SEGMENTS_SHOWN = 3
+
+# Identical analysis requests sent at once, to exercise server-side concurrency and the session pool
+CONCURRENT_ANALYSES = 5
+
+# Sample conversation for the analysis check, encoded once at import
+_TEST_REQUEST = {
+    "conversation": {
+        "id": 12345,
+        "type": "chat",
+        "messages": [
+            {
+                "id": "msg_001",
+                "role": "customer",
+                "content": "Hey, I just saw an alert about unpaid invoices—where do I check them?",
+                "timestamp": "2024-01-15T08:50:00Z"
+            },
+            {
+                "id": "msg_002",
+                "role": "agent",
+                "content": "Sure—head over to Billing → Invoices and you'll see all your bills.",
+                "timestamp": "2024-01-15T08:51:00Z"
+            },
+            {
+                "id": "msg_003",
+                "role": "customer",
+                "content": "In 'Invoices' I only see paid ones. How do I filter unpaid?",
+                "timestamp": "2024-01-15T08:53:00Z"
+            },
+            {
+                "id": "msg_004",
+                "role": "agent",
+                "content": "There's a 'Status' dropdown up top—select 'Unpaid.'",
+                "timestamp": "2024-01-15T08:54:00Z"
+            },
+            {
+                "id": "msg_005",
+                "role": "customer",
+                "content": "I need to disable 2FA just this once—how?",
+                "timestamp": "2024-01-15T09:12:00Z"
+            },
+            {
+                "id": "msg_006",
+                "role": "agent",
+                "content": "In Security Settings there's a 'Disable 2FA' toggle.",
+                "timestamp": "2024-01-15T09:13:00Z"
+            },
+            {
+                "id": "msg_007",
+                "role": "customer",
+                "content": "I don't see that toggle in Security Settings.",
+                "timestamp": "2024-01-15T09:15:00Z"
+            },
+            {
+                "id": "msg_008",
+                "role": "agent",
+                "content": "You might not have permission—ask your admin to disable it.",
+                "timestamp": "2024-01-15T09:16:00Z"
+            }
+        ]
+    },
+    "integratedKbId": "kb_12345"
+}
+_TEST_REQUEST_BYTES = orjson.dumps(_TEST_REQUEST)
+# An analysis makes one segmentation LLM call plus an answer and a scoring call per Q&A thread
+# (at most one thread per customer message). The concurrent copies compete for the same LLM
+# quota, so each extra one adds a share of that budget; never go below the old 60 s.
+_LLM_ROUND_TRIP_SECONDS = 5.0
+_LLM_CALLS_PER_ANALYSIS = 1 + 2 * sum(
+    msg["role"] == "customer" for msg in _TEST_REQUEST["conversation"]["messages"]
+)
+_ANALYSIS_TIMEOUT = max(
+    60.0,
+    _LLM_ROUND_TRIP_SECONDS * _LLM_CALLS_PER_ANALYSIS * (1 + 0.25 * (CONCURRENT_ANALYSES - 1))
+)
+
+# Pretty-print template for one question rating, filled with format_map
+_RATING_TEMPLATE = (
+    "\n[Question Rating #{index}]\n"
+    "  🔄 Stage 1 - Rewritten Question: {aiRewrittenQuestion}\n"
+    "  👤 Agent's Answer: {agentAnswer}\n"
+    "  🤖 Stage 2 - AI Suggested Answer: {aiSuggestedAnswer}\n"
+    "  📊 Stage 3 - AI Score: {aiScore}/5.0\n"
+    "  📝 Stage 3 - AI Rationale: {aiRationale}\n"
+)
+
+HEALTH_URLS = {
+    "Chat Data Service": "http://localhost:8001/",
+    "QA Analysis Service": "http://localhost:8000/health",
+}
+
+
+def wait_ready(url: str, total: float = 10.0) -> bool:
+    """Poll a health endpoint until it answers, backing off between attempts.
+    
+    Args:
+        url: Service health endpoint URL.
+        total: Maximum number of seconds to wait.
+        
+    Returns:
+        bool: True if the service answered 200 before the deadline.
+    """
+    delay = 0.05
+    deadline = time.monotonic() + total
+    while time.monotonic() < deadline:
+        try:
+            if SESSION.get(url, timeout=0.5).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(delay)
+        delay = min(delay * 2, 0.5)
+    return False
+
+
+def _json_ok(response: requests.Response):
+    """Decode a response body if it is a successful JSON reply.
+    
+    Args:
+        response: The HTTP response.
+        
+    Returns:
+        The decoded body, or None for a non-200 status or non-JSON body.
+    """
+    if response.status_code != 200:
+        return None
+    if "json" not in response.headers.get("Content-Type", ""):
+        return None
+    return orjson.loads(response.content)
+
+
+class _ThreadOutput(io.TextIOBase):
+    """stdout stand-in that collects each capturing thread's prints separately."""
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+    
+    def write(self, text: str) -> int:
+        return (getattr(self._local, "buffer", None) or self._stream).write(text)
+    
+    def flush(self):
+        self._stream.flush()
+    
+    def capture(self, test_function) -> tuple:
+        """Run a test function, returning its result and everything it printed."""
+        self._local.buffer = io.StringIO()
+        try:
+            return test_function(), self._local.buffer.getvalue()
+        finally:
+            self._local.buffer = None
 
 
 def test_service_health(url: str, service_name: str) -> bool:
@@ -17,17 +203,28 @@ def test_service_health(url: str, service_name: str) -> bool:
     Returns:
         bool: True if service is healthy.
     """
+    status = _health(url)
+    if status == 200:
+        print(f"✅ {service_name} is healthy")
+        return True
+    elif isinstance(status, int):
+        print(f"❌ {service_name} returned status {status}")
+    else:
+        print(f"❌ {service_name} is not responding: {status}")
+    return False
+
+
+@functools.lru_cache(maxsize=32)
+def _health(url: str):
+    """Probe a health endpoint once per run.
+    
+    Returns:
+        The response status code, or the connection error message.
+    """
     try:
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            print(f"✅ {service_name} is healthy")
-            return True
-        else:
-            print(f"❌ {service_name} returned status {response.status_code}")
-            return False
+        return SESSION.get(url, timeout=5).status_code
     except Exception as e:
-        print(f"❌ {service_name} is not responding: {e}")
-        return False
+        return str(e)
 
 
 def test_chat_data_service() -> bool:
@@ -35,18 +232,19 @@ def test_chat_data_service() -> bool:
     print("\n🧪 Testing Chat Data Service...")
     
     # Test health
-    if not test_service_health("http://localhost:8001/", "Chat Data Service"):
+    if not test_service_health(HEALTH_URLS["Chat Data Service"], "Chat Data Service"):
         return False
     
     # Test getting transcripts
     try:
-        response = requests.get("http://localhost:8001/transcripts", timeout=10)
-        if response.status_code == 200:
-            transcripts = response.json()
+        response = SESSION.get("http://localhost:8001/transcripts", timeout=10)
+        transcripts = _json_ok(response)
+        if transcripts is not None:
             print(f"✅ Retrieved {len(transcripts)} sample transcripts")
             return True
         else:
-            print(f"❌ Failed to get transcripts: {response.status_code}")
+            print(f"❌ Failed to get transcripts: {response.status_code} "
+                  f"({response.headers.get('Content-Type', 'no content type')})")
             return False
     except Exception as e:
         print(f"❌ Error testing Chat Data Service: {e}")
@@ -69,30 +267,35 @@ def test_real_rag_service() -> bool:
             "questions": ["How do I filter unpaid invoices?"]
         }
         
-        response = requests.post(rag_url, headers=headers, json=test_request, timeout=30)
-        response.raise_for_status()
-        
-        result = response.json()
-        print(f"✅ Real RAG Service Response: {len(result)} items")
-        
-        if result and len(result) > 0:
-            first_item = result[0]
-            if "topSegments" in first_item:
-                segments = first_item["topSegments"]
-                print(f"✅ Retrieved {len(segments)} KB segments")
-                
-                # Show all KB segments in detail
-                print(f"\n📚 All KB Segments Retrieved:")
-                for i, segment in enumerate(segments[:3], 1):  # Show top 3
-                    print(f"  Segment {i}:")
-                    print(f"    Content: {segment.get('segment', '')[:100]}...")
-                    print(f"    File: {segment.get('file', 'Unknown')}")
-                    print(f"    Score: {segment.get('score', 0):.3f}")
-                    print()
+        with SESSION.post(rag_url, headers=headers, data=orjson.dumps(test_request),
+                          timeout=30, stream=True) as response:
+            response.raise_for_status()
+            
+            # Stream segments off the socket and stop after the ones we show,
+            # instead of buffering and parsing a possibly multi-MB body
+            if ijson is not None:
+                response.raw.decode_content = True
+                all_segments = ijson.items(response.raw, 'item.topSegments.item', use_float=True)
             else:
-                print("⚠️  No topSegments found in response")
+                all_segments = (
+                    segment
+                    for item in orjson.loads(response.content)
+                    for segment in item.get("topSegments", ())
+                )
+            segments = list(itertools.islice(all_segments, RAG_SEGMENTS_SHOWN))
+        
+        if segments:
+            print(f"✅ Retrieved top {len(segments)} KB segments")
+            
+            print("\n📚 Top KB Segments Retrieved:")
+            for i, segment in enumerate(segments, 1):
+                print(f"  Segment {i}:")
+                print(f"    Content: {segment.get('segment', '')[:100]}...")
+                print(f"    File: {segment.get('file', 'Unknown')}")
+                print(f"    Score: {segment.get('score', 0):.3f}")
+                print()
         else:
-            print("⚠️  Empty response from RAG service")
+            print("⚠️  No topSegments found in RAG service response")
             
         return True
         
@@ -106,77 +309,33 @@ def test_qa_analysis_service() -> bool:
     print("\n🧪 Testing QA Analysis Service (3-Stage Algorithm)...")
     
     # Test health
-    if not test_service_health("http://localhost:8000/health", "QA Analysis Service"):
+    if not test_service_health(HEALTH_URLS["QA Analysis Service"], "QA Analysis Service"):
         return False
     
     # Test analysis with sample conversation
     try:
-        test_request = {
-            "conversation": {
-                "id": 12345,
-                "type": "chat",
-                "messages": [
-                    {
-                        "id": "msg_001",
-                        "role": "customer",
-                        "content": "Hey, I just saw an alert about unpaid invoices—where do I check them?",
-                        "timestamp": "2024-01-15T08:50:00Z"
-                    },
-                    {
-                        "id": "msg_002",
-                        "role": "agent",
-                        "content": "Sure—head over to Billing → Invoices and you'll see all your bills.",
-                        "timestamp": "2024-01-15T08:51:00Z"
-                    },
-                    {
-                        "id": "msg_003",
-                        "role": "customer",
-                        "content": "In 'Invoices' I only see paid ones. How do I filter unpaid?",
-                        "timestamp": "2024-01-15T08:53:00Z"
-                    },
-                    {
-                        "id": "msg_004",
-                        "role": "agent",
-                        "content": "There's a 'Status' dropdown up top—select 'Unpaid.'",
-                        "timestamp": "2024-01-15T08:54:00Z"
-                    },
-                    {
-                        "id": "msg_005",
-                        "role": "customer",
-                        "content": "I need to disable 2FA just this once—how?",
-                        "timestamp": "2024-01-15T09:12:00Z"
-                    },
-                    {
-                        "id": "msg_006",
-                        "role": "agent",
-                        "content": "In Security Settings there's a 'Disable 2FA' toggle.",
-                        "timestamp": "2024-01-15T09:13:00Z"
-                    },
-                    {
-                        "id": "msg_007",
-                        "role": "customer",
-                        "content": "I don't see that toggle in Security Settings.",
-                        "timestamp": "2024-01-15T09:15:00Z"
-                    },
-                    {
-                        "id": "msg_008",
-                        "role": "agent",
-                        "content": "You might not have permission—ask your admin to disable it.",
-                        "timestamp": "2024-01-15T09:16:00Z"
-                    }
-                ]
-            },
-            "integratedKbId": "kb_12345"
-        }
+        def post_analysis() -> tuple:
+            start = time.perf_counter()
+            response = SESSION.post(
+                "http://localhost:8000/aiqa/analysis/analyze", 
+                data=_TEST_REQUEST_BYTES,
+                headers={'Content-Type': 'application/json'},
+                timeout=_ANALYSIS_TIMEOUT
+            )
+            return response, time.perf_counter() - start
+        
+        with ThreadPoolExecutor(max_workers=CONCURRENT_ANALYSES) as pool:
+            timed = list(pool.map(lambda _: post_analysis(), range(CONCURRENT_ANALYSES)))
         
-        response = requests.post(
-            "http://localhost:8000/aiqa/analysis/analyze", 
-            json=test_request,
-            timeout=60  # Increased timeout for LLM calls
-        )
+        # Report the first failure, if any; otherwise show details for the first response
+        responses = [response for response, _ in timed]
+        response = next((r for r in responses if r.status_code != 200), responses[0])
+        result = _json_ok(response)
         
-        if response.status_code == 200:
-            result = response.json()
+        if result is not None:
+            latencies = [latency for _, latency in timed]
+            print(f"✅ {len(responses)} concurrent analyses - latency min {min(latencies):.2f}s, "
+                  f"median {statistics.median(latencies):.2f}s, max {max(latencies):.2f}s")
             print(f"✅ Analysis completed for conversation {result['conversationId']}")
             print(f"✅ Conversation type: {result['conversationType']}")
             print(f"✅ Number of question ratings: {len(result['questionRatings'])}")
@@ -185,22 +344,18 @@ def test_qa_analysis_service() -> bool:
 
             # Show details for each question rating
             if result['questionRatings']:
-                for i, rating in enumerate(result['questionRatings']):
-                    print(f"\n[Question Rating #{i+1}]")
-                    print(f"  🔄 Stage 1 - Rewritten Question: {rating['aiRewrittenQuestion']}")
-                    print(f"  👤 Agent's Answer: {rating['agentAnswer']}")
-                    print(f"  🤖 Stage 2 - AI Suggested Answer: {rating['aiSuggestedAnswer']}")
-                    print(f"  📊 Stage 3 - AI Score: {rating['aiScore']}/5.0")
-                    print(f"  📝 Stage 3 - AI Rationale: {rating['aiRationale']}")
+                # Each rating is assembled first and written with a single call
+                for i, rating in enumerate(result['questionRatings'], 1):
+                    parts = [_RATING_TEMPLATE.format_map({**rating, "index": i})]
                     
                     # Show KB verification chunks (verified context passed to Stage 3)
                     kb_chunks = rating.get('kbVerifyInternal', [])
                     if kb_chunks:
-                        print(f"  🔍 Stage 3 - KB Verification Chunks ({len(kb_chunks)}):")
-                        for j, chunk in enumerate(kb_chunks, 1):
-                            print(f"    Chunk {j}: {chunk[:100]}...")
+                        parts.append(f"  🔍 Stage 3 - KB Verification Chunks ({len(kb_chunks)}):\n")
+                        parts.extend(f"    Chunk {j}: {chunk[:100]}...\n" for j, chunk in enumerate(kb_chunks, 1))
                     else:
-                        print(f"  ⚠️  Stage 3 - No KB verification chunks found")
+                        parts.append("  ⚠️  Stage 3 - No KB verification chunks found\n")
+                    sys.stdout.write("".join(parts))
             else:
                 print("No question ratings were generated from the conversation.")
             
@@ -218,11 +373,15 @@ def main():
     """Run all service tests."""
     print("🧪 AI Quality Assurance Service Test Suite (3-Stage Algorithm)")
     print("=" * 50)
+    _health.cache_clear()
     
+    # Poll the local services instead of sleeping: no wait when they're already up
     print("Waiting for services to start up...")
-    time.sleep(2)
-    
-    all_passed = True
+    with ThreadPoolExecutor(max_workers=len(HEALTH_URLS)) as pool:
+        ready = list(pool.map(wait_ready, HEALTH_URLS.values()))
+    for service_name, is_ready in zip(HEALTH_URLS, ready):
+        if not is_ready:
+            print(f"⚠️  {service_name} did not become ready")
     
     # Test each service
     services = [
@@ -231,11 +390,30 @@ def main():
         ("QA Analysis Service", test_qa_analysis_service)
     ]
     
-    for service_name, test_function in services:
-        if not test_function():
-            all_passed = False
+    def run_timed(service: tuple) -> tuple:
+        start = time.perf_counter_ns()
+        passed, text = output.capture(service[1])
+        return service[0], passed, (time.perf_counter_ns() - start) / 1e6, text
+    
+    # The checks are independent and only wait on network I/O, so run them side by side.
+    # Each check's output is buffered and printed whole, in order, so reports don't interleave.
+    stdout = sys.stdout
+    output = _ThreadOutput(stdout)
+    results = []
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=len(services)) as pool:
+            for service_name, passed, elapsed_ms, text in pool.map(run_timed, services):
+                output.write(text)
+                results.append((service_name, passed, elapsed_ms))
+    finally:
+        sys.stdout = stdout
+    all_passed = all(passed for _, passed, _ in results)
     
     print("\n" + "=" * 50)
+    print("⏱️  Timing:")
+    for service_name, passed, elapsed_ms in results:
+        print(f"  {service_name:30s} {'OK' if passed else 'FAIL':5s} {elapsed_ms:8.1f} ms")
     if all_passed:
         print("🎉 All tests passed! Services are working correctly.")
         sys.exit(0)
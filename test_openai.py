@@ -9,7 +9,6 @@ sys.path.append('qa_analysis_service')
 
 try:
     from app.config import settings
-    from app.services.llm_client import LLMClient, LLMClientError
     
     print("🧪 Testing OpenAI API Configuration")
     print("=" * 50)
@@ -23,6 +22,9 @@ try:
         print("❌ ERROR: OpenAI API key not set or too short")
         sys.exit(1)
     
+    # Imported only once the key is known to be set: the client pulls in the openai SDK
+    from app.services.llm_client import LLMClient, LLMClientError
+    
     # Test LLM client
     print(f"\n🔧 Testing LLM Client...")
     try: